@@ -1,15 +1,18 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import os
+import shutil
+import threading
+from collections import OrderedDict
 from datetime import datetime, timezone
+from typing import BinaryIO, Iterable, Iterator
 
-import pandas as pd
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
-from fastapi.responses import FileResponse, Response
+from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse
 
 from app.core.config import settings
+from app.core.jsonio import read_json
 from app.schemas.documents import (
     UploadResponse,
     StatusResponse,
@@ -17,8 +20,8 @@ from app.schemas.documents import (
     GlobalTableResponse,
     ExportRequest,
 )
-from app.services.exporting import to_csv_bytes, to_excel_bytes_multi
-from app.services.processing import DocumentProcessor, new_document_id
+from app.services.exporting import encode_csv_rows, to_xlsx_bytes_fast
+from app.services.processing import new_document_id
 from app.services.pdf import pdf_num_pages
 from app.storage.filesystem import FilesystemStorage
 from app.storage.progress import InMemoryProgressStore
@@ -26,47 +29,108 @@ from app.storage.progress import InMemoryProgressStore
 
 router = APIRouter()
 
-_storage = FilesystemStorage(settings.storage_dir)
-_progress = InMemoryProgressStore()
-_processor = DocumentProcessor(storage=_storage, progress=_progress)
+
+# Parsed table JSON, keyed by (document_id, filename) and validated by file mtime.
+_PAYLOAD_CACHE_MAX = 256
+_payload_cache: OrderedDict[tuple[str, str], tuple[int, dict]] = OrderedDict()
+_payload_cache_lock = threading.Lock()
 
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def _storage(request: Request) -> FilesystemStorage:
+    return request.app.state.storage
+
+
+def _progress(request: Request) -> InMemoryProgressStore:
+    return request.app.state.progress
+
+
+def _copy_upload(src: BinaryIO, path: str) -> None:
+    src.seek(0)
+    with open(path, "wb") as out:
+        shutil.copyfileobj(src, out, length=1 << 20)
+
+
+def _load_table_json(document_id: str, path: str) -> dict:
+    """
+    Read a tables/*.json payload, reusing the parsed dict while the file is unchanged.
+    Callers must treat the returned dict as read-only (it is shared between requests).
+    """
+    key = (document_id, os.path.basename(path))
+    mtime = os.stat(path).st_mtime_ns
+    with _payload_cache_lock:
+        hit = _payload_cache.get(key)
+        if hit is not None and hit[0] == mtime:
+            _payload_cache.move_to_end(key)
+            return hit[1]
+
+    payload = read_json(path)
+    with _payload_cache_lock:
+        _payload_cache[key] = (mtime, payload)
+        _payload_cache.move_to_end(key)
+        while len(_payload_cache) > _PAYLOAD_CACHE_MAX:
+            _payload_cache.popitem(last=False)
+    return payload
+
+
+def _load_page(document_id: str, tables_dir: str, page_number: int) -> dict | None:
+    page_path = os.path.join(tables_dir, f"page_{page_number}.json")
+    if not os.path.exists(page_path):
+        return None
+    return _load_table_json(document_id, page_path)
+
+
 @router.post("/upload", response_model=UploadResponse)
 async def upload_document(
+    request: Request,
     file: UploadFile = File(...),
     pdf_password: str | None = Form(default=None),
 ):
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Please upload a PDF file.")
 
-    pdf_bytes = await file.read()
+    queue: asyncio.Queue[dict] = request.app.state.work_queue
+    # Fast path only: other uploads can fill the queue while this one is copied and checked.
+    if queue.full():
+        raise HTTPException(status_code=503, detail="Too many documents queued. Please try again shortly.")
+
+    document_id = new_document_id()
+    paths = _storage(request).document_paths(document_id)  # ensure dirs exist
+
+    # Stream the (spooled) upload to original.pdf instead of reading it into memory.
+    await asyncio.to_thread(_copy_upload, file.file, paths.pdf_path)
 
     try:
-        num_pages = pdf_num_pages(pdf_bytes, password=pdf_password)
+        # MuPDF parsing is synchronous; keep it off the event loop.
+        num_pages = await asyncio.to_thread(pdf_num_pages, paths.pdf_path, pdf_password)
     except ValueError as e:
+        shutil.rmtree(paths.root, ignore_errors=True)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        shutil.rmtree(paths.root, ignore_errors=True)
         raise HTTPException(status_code=400, detail=f"Error opening PDF: {e}")
 
-    document_id = new_document_id()
-    _storage.document_paths(document_id)  # ensure dirs exist
-    _progress.create(document_id, total_pages=num_pages)
-
-    # Fire-and-forget processing
-    asyncio.create_task(
-        _processor.process_pdf_bytes(
-            document_id=document_id,
-            pdf_bytes=pdf_bytes,
-            pdf_password=pdf_password,
-            chunk_height=settings.default_chunk_height,
-            overlap=settings.default_overlap,
-            prompt=settings.gemini_prompt,
+    # Processed by the bounded worker pool started in the app lifespan.
+    try:
+        queue.put_nowait(
+            {
+                "document_id": document_id,
+                "pdf_path": paths.pdf_path,
+                "pdf_password": pdf_password,
+                "chunk_height": settings.default_chunk_height,
+                "overlap": settings.default_overlap,
+                "prompt": settings.gemini_prompt,
+            }
         )
-    )
+    except asyncio.QueueFull:
+        shutil.rmtree(paths.root, ignore_errors=True)
+        raise HTTPException(status_code=503, detail="Too many documents queued. Please try again shortly.")
+
+    # No await since the put: the worker can't pick the job up before its progress entry exists.
+    _progress(request).create(document_id, total_pages=num_pages)
 
     return UploadResponse(
         document_id=document_id,
@@ -77,8 +141,8 @@ async def upload_document(
 
 
 @router.get("/{document_id}/status", response_model=StatusResponse)
-async def document_status(document_id: str):
-    st = _progress.get(document_id)
+async def document_status(request: Request, document_id: str):
+    st = _progress(request).get(document_id)
     if not st:
         raise HTTPException(status_code=404, detail="Document not found.")
     return StatusResponse(
@@ -95,13 +159,13 @@ async def document_status(document_id: str):
 
 
 @router.get("/{document_id}/pages/{page_number}/image")
-async def get_page_image(document_id: str, page_number: int):
+async def get_page_image(request: Request, document_id: str, page_number: int):
     if page_number < 1:
         raise HTTPException(status_code=400, detail="page_number must be >= 1")
-    paths = _storage.document_paths(document_id)
+    paths = _storage(request).document_paths(document_id)
     img_path = os.path.join(paths.pages_dir, f"{page_number}.png")
     if not os.path.exists(img_path):
-        st = _progress.get(document_id)
+        st = _progress(request).get(document_id)
         if not st:
             raise HTTPException(status_code=404, detail="Document not found.")
         raise HTTPException(status_code=409, detail="Page image not available yet.")
@@ -109,115 +173,151 @@ async def get_page_image(document_id: str, page_number: int):
 
 
 @router.get("/{document_id}/pages/{page_number}/table", response_model=PageTableResponse)
-async def get_page_table(document_id: str, page_number: int):
+async def get_page_table(request: Request, document_id: str, page_number: int):
     if page_number < 1:
         raise HTTPException(status_code=400, detail="page_number must be >= 1")
-    paths = _storage.document_paths(document_id)
+    paths = _storage(request).document_paths(document_id)
     table_path = os.path.join(paths.tables_dir, f"page_{page_number}.json")
     if not os.path.exists(table_path):
-        st = _progress.get(document_id)
+        st = _progress(request).get(document_id)
         if not st:
             raise HTTPException(status_code=404, detail="Document not found.")
         raise HTTPException(status_code=409, detail="Table not available yet.")
-    with open(table_path, "r", encoding="utf-8") as f:
-        payload = json.load(f)
+    payload = _load_table_json(document_id, table_path)
     return PageTableResponse(**payload)
 
 
 @router.get("/{document_id}/table", response_model=GlobalTableResponse)
-async def get_global_table(document_id: str):
-    paths = _storage.document_paths(document_id)
+async def get_global_table(request: Request, document_id: str):
+    paths = _storage(request).document_paths(document_id)
     global_path = os.path.join(paths.tables_dir, "global.json")
     if not os.path.exists(global_path):
-        st = _progress.get(document_id)
+        st = _progress(request).get(document_id)
         if not st:
             raise HTTPException(status_code=404, detail="Document not found.")
         raise HTTPException(status_code=409, detail="Global table not available yet.")
-    with open(global_path, "r", encoding="utf-8") as f:
-        payload = json.load(f)
+    payload = _load_table_json(document_id, global_path)
     return GlobalTableResponse(**payload)
 
 
 @router.post("/{document_id}/export")
-async def export_document(document_id: str, req: ExportRequest):
-    paths = _storage.document_paths(document_id)
+async def export_document(request: Request, document_id: str, req: ExportRequest):
+    paths = _storage(request).document_paths(document_id)
     global_path = os.path.join(paths.tables_dir, "global.json")
     if not os.path.exists(global_path):
-        st = _progress.get(document_id)
+        st = _progress(request).get(document_id)
         if not st:
             raise HTTPException(status_code=404, detail="Document not found.")
         raise HTTPException(status_code=409, detail="Global table not available yet.")
 
-    if req.format == "csv":
-        # CSV is single-sheet by nature: normalize across pages.
-        with open(global_path, "r", encoding="utf-8") as f:
-            payload = json.load(f)
-        rows: list[dict] = payload.get("rows") or []
-
-        # Union headers across per-page tables (intelligent normalization).
-        union_header: list[str] = []
-        page_headers: dict[int, list[str]] = {}
-        total_pages = (_progress.get(document_id).total_pages if _progress.get(document_id) else None) or 0
-        for p in range(1, int(total_pages) + 1):
-            page_path = os.path.join(paths.tables_dir, f"page_{p}.json")
-            if not os.path.exists(page_path):
-                continue
-            with open(page_path, "r", encoding="utf-8") as pf:
-                page_payload = json.load(pf)
-            h = page_payload.get("header") or []
-            page_headers[p] = h
-            for col in h:
-                if col not in union_header:
-                    union_header.append(col)
-
-        out_rows = []
-        for r in rows:
-            page_no = int(r.get("page_number") or 0)
-            values = r.get("values") or []
-            h = page_headers.get(page_no, [])
-            row_map = {h[i]: values[i] for i in range(min(len(h), len(values)))}
-            out = {"page_number": page_no, **{c: row_map.get(c, "") for c in union_header}}
-            if req.include_confidence:
-                out["confidence"] = float(r.get("confidence") or 0.0)
-            out_rows.append(out)
+    st = _progress(request).get(document_id)
+    total_pages = int(st.total_pages or 0) if st else 0
+    page_paths = [os.path.join(paths.tables_dir, f"page_{p}.json") for p in range(1, total_pages + 1)]
 
-        df = pd.DataFrame(out_rows, columns=["page_number", *union_header, *(["confidence"] if req.include_confidence else [])])
-        content = to_csv_bytes(df)
-        media_type = "text/csv"
-        filename = f"{document_id}.csv"
+    if req.format == "csv":
+        ext, media_type = "csv", "text/csv"
     else:
-        # Excel: one sheet per page (supports changing table structures).
-        st = _progress.get(document_id)
-        total_pages = int(st.total_pages or 0) if st else 0
-        sheets: dict[str, pd.DataFrame] = {}
-        for p in range(1, total_pages + 1):
-            page_path = os.path.join(paths.tables_dir, f"page_{p}.json")
+        ext, media_type = "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        for p, page_path in enumerate(page_paths, start=1):
             if not os.path.exists(page_path):
                 raise HTTPException(status_code=409, detail=f"Page {p} table not available yet.")
-            with open(page_path, "r", encoding="utf-8") as pf:
-                page_payload = json.load(pf)
-            header: list[str] = page_payload.get("header") or []
-            values: list[list[str]] = page_payload.get("rows") or []
-            df_page = pd.DataFrame(values, columns=header if header else None)
-            if req.include_confidence:
-                meta = page_payload.get("row_metadata") or []
-                df_page["confidence"] = [float(m.get("confidence") or 0.0) for m in meta]
-            sheets[f"Page {p}"] = df_page
-
-        try:
-            content = to_excel_bytes_multi(sheets)
-        except ModuleNotFoundError as e:
-            # pandas ExcelWriter(engine="openpyxl") requires openpyxl installed
-            if "openpyxl" in str(e):
-                raise HTTPException(
-                    status_code=500,
-                    detail="Excel export requires 'openpyxl'. Install it with: pip install openpyxl",
-                )
-            raise
-        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        filename = f"{document_id}.xlsx"
-
-    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-    return Response(content=content, media_type=media_type, headers=headers)
 
+    # Exports are cached on disk and re-served (sendfile) until any input table changes.
+    variant = "" if req.include_confidence else "_noconf"
+    export_path = os.path.join(paths.exports_dir, f"{document_id}{variant}.{ext}")
+    if not _export_is_fresh(export_path, [global_path, *page_paths]):
+        # Page loads are independent and I/O-bound: overlap them across worker threads.
+        page_payloads = await asyncio.gather(
+            *[asyncio.to_thread(_load_page, document_id, paths.tables_dir, p) for p in range(1, total_pages + 1)]
+        )
+        if req.format == "csv":
+            global_payload = await asyncio.to_thread(_load_table_json, document_id, global_path)
+            chunks = _csv_export_chunks(global_payload, page_payloads, req)
+        else:
+            chunks = _xlsx_export_chunks(page_payloads, req)
+        await asyncio.to_thread(_write_export, export_path, chunks)
 
+    return FileResponse(export_path, media_type=media_type, filename=f"{document_id}.{ext}")
+
+
+def _export_is_fresh(export_path: str, input_paths: list[str]) -> bool:
+    try:
+        export_mtime = os.stat(export_path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+    return all(os.stat(p).st_mtime_ns <= export_mtime for p in input_paths if os.path.exists(p))
+
+
+def _write_export(path: str, chunks: Iterable[bytes]) -> None:
+    # Write under a temp name so concurrent requests never serve a partial file.
+    tmp_path = f"{path}.{new_document_id()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _csv_export_chunks(
+    global_payload: dict, page_payloads: list[dict | None], req: ExportRequest
+) -> Iterator[bytes]:
+    # CSV is single-sheet by nature: normalize across pages.
+    rows: list[dict] = global_payload.get("rows") or []
+
+    # Union headers across per-page tables (intelligent normalization).
+    union_header: list[str] = []
+    seen: set[str] = set()
+    page_headers: dict[int, list[str]] = {}
+    for p, page_payload in enumerate(page_payloads, start=1):
+        if page_payload is None:
+            continue
+        h = page_payload.get("header") or []
+        page_headers[p] = h
+        for col in h:
+            if col not in seen:
+                seen.add(col)
+                union_header.append(col)
+
+    # Map each page's columns onto union-header positions once, then fill plain lists.
+    col_idx = {c: i for i, c in enumerate(union_header)}
+    rows_by_page: dict[int, list[dict]] = {}
+    for r in rows:
+        rows_by_page.setdefault(int(r.get("page_number") or 0), []).append(r)
+
+    yield encode_csv_rows([["page_number", *union_header, *(["confidence"] if req.include_confidence else [])]])
+
+    # Encode page by page so only one page's CSV is ever held in memory.
+    for page_no, page_rows in rows_by_page.items():
+        page_idx = [col_idx[c] for c in page_headers.get(page_no, [])]
+        out_rows: list[list] = []
+        for r in page_rows:
+            buf: list = [""] * len(union_header)
+            for i, v in zip(page_idx, r.get("values") or []):
+                buf[i] = v
+            out = [page_no, *buf]
+            if req.include_confidence:
+                out.append(float(r.get("confidence") or 0.0))
+            out_rows.append(out)
+        yield encode_csv_rows(out_rows)
+
+
+def _xlsx_export_chunks(page_payloads: list[dict | None], req: ExportRequest) -> Iterator[bytes]:
+    # Excel: one sheet per page (supports changing table structures).
+    sheets: dict[str, list[list]] = {}
+    sheet_headers: dict[str, list[str]] = {}
+    for p, page_payload in enumerate(page_payloads, start=1):
+        page_payload = page_payload or {}
+        header: list[str] = page_payload.get("header") or []
+        values: list[list] = page_payload.get("rows") or []
+        if req.include_confidence:
+            meta = page_payload.get("row_metadata") or []
+            header = [*header, "confidence"]
+            values = [[*row, float(m.get("confidence") or 0.0)] for row, m in zip(values, meta)]
+        sheets[f"Page {p}"] = values
+        sheet_headers[f"Page {p}"] = header
+
+    # Rows are already plain strings (+ float confidence): emit the sheet XML directly.
+    yield to_xlsx_bytes_fast(sheets, sheet_headers)
@@ -20,6 +20,13 @@ class Settings(BaseModel):
     api_v1_prefix: str = "/api/v1"
     storage_dir: str = os.getenv("STORAGE_DIR", os.path.join(os.getcwd(), "storage"))
     gemini_api_key: str | None = os.getenv("GEMINI_API_KEY")
+    # Optional comma-separated keys (ideally from separate projects); calls rotate across them.
+    #   GEMINI_API_KEYS=key1,key2,key3
+    gemini_api_keys: list[str] = (
+        [k.strip() for k in os.getenv("GEMINI_API_KEYS", "").split(",") if k.strip()]
+        if os.getenv("GEMINI_API_KEYS")
+        else ([os.environ["GEMINI_API_KEY"]] if os.getenv("GEMINI_API_KEY") else [])
+    )
     gemini_model: str = os.getenv("GEMINI_MODEL", "gemini-3-flash-preview")
     gemini_prompt: str = os.getenv(
         "GEMINI_PROMPT",
@@ -30,6 +37,12 @@ class Settings(BaseModel):
 
     # Biggest speed lever: DPI (override via env if needed).
     pdf_render_dpi: int = int(os.getenv("PDF_RENDER_DPI", "200"))
+    # Processes used to rasterize pages (1 = render in-process, 0 = one per CPU).
+    # A spawn pool is started per document (~0.5-1s), so it only pays off for long PDFs.
+    pdf_render_workers: int = int(os.getenv("PDF_RENDER_WORKERS", "1"))
+    # Processes used to parse model output (1 = parse in-process, 0 = one per CPU).
+    # Pages parse in milliseconds, so IPC and spawn startup usually outweigh the pool.
+    parse_workers: int = int(os.getenv("PARSE_WORKERS", "1"))
 
     # Chunking defaults (override as needed).
     # These are logical units before DPI scaling in the processor.
@@ -38,9 +51,24 @@ class Settings(BaseModel):
 
     # Concurrency for Gemini calls (keep small to avoid 429s).
     gemini_concurrency: int = int(os.getenv("GEMINI_CONCURRENCY", "3"))
+    # Per-minute request / input-token budgets for Gemini pacing, per API key
+    # (0 = unlimited; set to your tier).
+    gemini_rpm: int = int(os.getenv("GEMINI_RPM", "0"))
+    gemini_tpm: int = int(os.getenv("GEMINI_TPM", "0"))
+
+    # Pages whose chunks may be extracted at once; parsing of page N overlaps extraction of N+1.
+    # 1 = strictly page by page.
+    pipeline_depth: int = int(os.getenv("PIPELINE_DEPTH", "2"))
+
+    # Documents processed at once, and how many uploads may wait in the queue (503 when full).
+    processing_workers: int = int(os.getenv("PROCESSING_WORKERS", "2"))
+    processing_queue_size: int = int(os.getenv("PROCESSING_QUEUE_SIZE", "100"))
 
     # Downscale chunk images before sending to Gemini (reduces upload + model work).
     max_chunk_width: int = int(os.getenv("MAX_CHUNK_WIDTH", "1600"))
+    # Resampling filter for that downscale: "bilinear" (fast) or "lanczos".
+    # Lanczos is always used below a 0.5x ratio.
+    downscale_filter: str = os.getenv("DOWNSCALE_FILTER", "bilinear").strip().lower()
 
     # Disk I/O controls (chunk images + raw text are expensive).
     save_page_images: bool = _env_bool("SAVE_PAGE_IMAGES", True)
@@ -49,6 +77,10 @@ class Settings(BaseModel):
 
     # Faster PNG writes (bigger files, but much less CPU).
     png_compress_level: int = int(os.getenv("PNG_COMPRESS_LEVEL", "1"))
+
+    # Encoding for chunk images (sent to Gemini and, if enabled, saved): "jpeg" (fast) or "png".
+    chunk_format: str = os.getenv("CHUNK_FORMAT", "jpeg").strip().lower()
+    chunk_jpeg_quality: int = int(os.getenv("CHUNK_JPEG_QUALITY", "85"))
     # Comma-separated list of allowed origins, e.g.:
     #   CORS_ALLOW_ORIGINS=https://<your-swa>.azurestaticapps.net,https://www.yourdomain.com
     cors_allow_origins: list[str] = (
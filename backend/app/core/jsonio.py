@@ -0,0 +1,33 @@
+"""
+JSON helpers for table payloads.
+Uses orjson when installed (much faster on large payloads), stdlib json otherwise.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(payload: Any, *, indent: bool = False) -> bytes:
+    if orjson is not None:
+        # OPT_NON_STR_KEYS matches stdlib json, which stringifies int/float dict keys.
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(payload, option=option)
+    return json.dumps(payload, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+
+def read_json(path: str) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
@@ -1,14 +1,46 @@
 from __future__ import annotations
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.api.v1.router import api_router
+from app.services.gemini import close_gemini_clients
+from app.services.processing import DocumentProcessor, run_processing_worker
+from app.storage.filesystem import FilesystemStorage
+from app.storage.progress import InMemoryProgressStore
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Created once per process (not at import time); handlers read them via request.app.state.
+    storage = FilesystemStorage(settings.storage_dir)
+    progress = InMemoryProgressStore()
+    app.state.storage = storage
+    app.state.progress = progress
+    app.state.processor = DocumentProcessor(storage=storage, progress=progress)
+
+    # Bounded job queue + fixed worker pool caps concurrent documents (memory, Gemini 429s).
+    app.state.work_queue = asyncio.Queue(maxsize=max(1, settings.processing_queue_size))
+    workers = [
+        asyncio.create_task(run_processing_worker(app.state.processor, app.state.work_queue))
+        for _ in range(max(1, settings.processing_workers))
+    ]
+    try:
+        yield
+    finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        app.state.processor.close()
+        close_gemini_clients()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title=settings.app_name)
+    app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
     allow_credentials = True
     if settings.cors_allow_origins == ["*"]:
@@ -1,21 +1,29 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+
+import numpy as np
 from PIL import Image
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ImageChunk:
     chunk_index: int
     top: int
     bottom: int
     left: int
     right: int
-    image: Image.Image
+    # View into the page's pixel array (no copy until a PIL image is needed).
+    pixels: np.ndarray
+
+    @property
+    def image(self) -> Image.Image:
+        """Materialize the chunk as a PIL image (copies pixels; call once per use site)."""
+        return Image.fromarray(self.pixels)
 
 
 def iter_vertical_chunks(
-    page_image: Image.Image,
+    page_image: Image.Image | np.ndarray,
     *,
     chunk_height: int = 500,
     overlap: int = 50,
@@ -25,30 +33,16 @@ def iter_vertical_chunks(
     - fixed chunk height (default 500px)
     - overlap (default 50px)
     """
-    width, height = page_image.size
-    chunks: list[ImageChunk] = []
-
-    chunk_idx = 0
-    y = 0
-    while y < height:
-        top = max(0, y - (overlap if chunk_idx > 0 else 0))
-        bottom = min(height, y + chunk_height + overlap)
-        left = 0
-        right = width
-        chunk_img = page_image.crop((left, top, right, bottom))
-        chunks.append(
-            ImageChunk(
-                chunk_index=chunk_idx + 1,
-                top=top,
-                bottom=bottom,
-                left=left,
-                right=right,
-                image=chunk_img,
-            )
-        )
-        chunk_idx += 1
-        y += chunk_height
-
-    return chunks
-
-
+    arr = np.asarray(page_image)
+    height, width = arr.shape[:2]
+
+    # Chunk starts are y = i * chunk_height; only the first chunk skips the top overlap.
+    n = -(-height // chunk_height)  # ceil(height / chunk_height)
+    ys = range(0, n * chunk_height, chunk_height)
+    tops = [0, *(max(0, y - overlap) for y in ys[1:])]
+    bottoms = [min(height, y + chunk_height + overlap) for y in ys]
+
+    return [
+        ImageChunk(chunk_index=i + 1, top=top, bottom=bottom, left=0, right=width, pixels=arr[top:bottom])
+        for i, (top, bottom) in enumerate(zip(tops, bottoms))
+    ]
@@ -1,30 +1,164 @@
 from __future__ import annotations
 
 from io import BytesIO
-import pandas as pd
+from typing import Iterable
+import zipfile
 
 
-def to_csv_bytes(df: pd.DataFrame) -> bytes:
-    return df.to_csv(index=False).encode("utf-8")
+def _csv_cell(value: object) -> str:
+    if value is None:
+        return ""
+    s = value if isinstance(value, str) else str(value)
+    # Minimal quoting: only cells containing the delimiter, a quote or a line break.
+    # (Plain `in` checks beat both str.translate and a regex here.)
+    if "," in s or '"' in s or "\n" in s or "\r" in s:
+        return '"' + s.replace('"', '""') + '"'
+    return s
 
 
-def to_excel_bytes(df: pd.DataFrame, *, sheet_name: str = "Extracted") -> bytes:
-    bio = BytesIO()
-    with pd.ExcelWriter(bio, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name=sheet_name)
-    return bio.getvalue()
+def encode_csv_rows(rows: Iterable[Iterable[object]]) -> bytes:
+    """
+    Encode rows as UTF-8 CSV with minimal quoting and '\n' line endings
+    (matches DataFrame.to_csv for our string/int/float cells, but also quotes a bare '\r').
+    """
+    return "".join([",".join(map(_csv_cell, row)) + "\n" for row in rows]).encode("utf-8")
+
+
+# Minimal SpreadsheetML package parts for value-only workbooks.
+_XLSX_CONTENT_TYPES_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/sharedStrings.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_XLSX_SHEET_HEAD = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_XLSX_SHEET_TAIL = b"</sheetData></worksheet>"
+
+# Escape XML text and drop control chars that are illegal in XML 1.0.
+_XML_ESCAPE = str.maketrans(
+    {
+        "&": "&amp;",
+        "<": "&lt;",
+        ">": "&gt;",
+        **{chr(c): None for c in range(0x20) if c not in (0x09, 0x0A, 0x0D)},
+    }
+)
+_XML_ATTR_ESCAPE = str.maketrans({**_XML_ESCAPE, ord('"'): "&quot;"})
 
 
-def to_excel_bytes_multi(sheets: dict[str, pd.DataFrame]) -> bytes:
+def _xlsx_column_letters(n: int) -> list[str]:
+    letters: list[str] = []
+    for i in range(1, n + 1):
+        s = ""
+        while i:
+            i, rem = divmod(i - 1, 26)
+            s = chr(65 + rem) + s
+        letters.append(s)
+    return letters
+
+
+def to_xlsx_bytes_fast(sheets: dict[str, list[list[str]]], headers: dict[str, list[str]]) -> bytes:
     """
-    Create an .xlsx with one sheet per key in `sheets`.
+    Write an .xlsx directly as SpreadsheetML (no pandas / Excel library).
+    One sheet per key in `sheets`; `headers[name]` (if non-empty) becomes the first row.
+    Strings go through a shared-strings table, ints/floats are written as numbers.
     Sheet names are truncated to Excel's 31-char limit.
     """
+    esc = _XML_ESCAPE
+    shared: dict[str, int] = {}
+    sheet_names: list[str] = []
+
     bio = BytesIO()
-    with pd.ExcelWriter(bio, engine="openpyxl") as writer:
-        for name, df in sheets.items():
-            sheet_name = (name or "Sheet")[:31]
-            df.to_excel(writer, index=False, sheet_name=sheet_name)
-    return bio.getvalue()
+    with zipfile.ZipFile(bio, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for sheet_no, (name, rows) in enumerate(sheets.items(), start=1):
+            sheet_names.append((name or "Sheet")[:31])
+            header = headers.get(name) or []
+            all_rows = [header, *rows] if header else rows
+            width = max((len(r) for r in all_rows), default=0)
+            cols = _xlsx_column_letters(width)
+
+            with zf.open(f"xl/worksheets/sheet{sheet_no}.xml", "w") as f:
+                f.write(_XLSX_SHEET_HEAD)
+                for row_no, row in enumerate(all_rows, start=1):
+                    parts = [f'<row r="{row_no}">']
+                    for col, value in zip(cols, row):
+                        if value is None or value == "":
+                            continue
+                        ref = f"{col}{row_no}"
+                        if isinstance(value, (int, float)) and not isinstance(value, bool):
+                            parts.append(f'<c r="{ref}"><v>{value!r}</v></c>')
+                            continue
+                        s = str(value)
+                        idx = shared.get(s)
+                        if idx is None:
+                            idx = shared[s] = len(shared)
+                        parts.append(f'<c r="{ref}" t="s"><v>{idx}</v></c>')
+                    parts.append("</row>")
+                    f.write("".join(parts).encode("utf-8"))
+                f.write(_XLSX_SHEET_TAIL)
 
+        with zf.open("xl/sharedStrings.xml", "w") as f:
+            f.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                b'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                + f'count="{len(shared)}" uniqueCount="{len(shared)}">'.encode("utf-8")
+            )
+            # dicts preserve insertion order, which matches the assigned indices.
+            for s in shared:
+                f.write(f'<si><t xml:space="preserve">{s.translate(esc)}</t></si>'.encode("utf-8"))
+            f.write(b"</sst>")
 
+        n = len(sheet_names)
+        zf.writestr(
+            "[Content_Types].xml",
+            _XLSX_CONTENT_TYPES_HEAD
+            + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for i in range(1, n + 1)
+            )
+            + "</Types>",
+        )
+        zf.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+        zf.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + "".join(
+                f'<sheet name="{sn.translate(_XML_ATTR_ESCAPE)}" sheetId="{i}" r:id="rId{i}"/>'
+                for i, sn in enumerate(sheet_names, start=1)
+            )
+            + "</sheets></workbook>",
+        )
+        zf.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + "".join(
+                f'<Relationship Id="rId{i}" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                f'Target="worksheets/sheet{i}.xml"/>'
+                for i in range(1, n + 1)
+            )
+            + f'<Relationship Id="rId{n + 1}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+            'Target="sharedStrings.xml"/>'
+            "</Relationships>",
+        )
+    return bio.getvalue()
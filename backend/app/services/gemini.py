@@ -1,8 +1,15 @@
 from __future__ import annotations
 
 import asyncio
+import itertools
+import time
+from functools import lru_cache
+from typing import Callable
+
 from PIL import Image
 
+from app.services.rate_limit import AsyncTokenBucket
+
 
 DEFAULT_PROMPT = (
     "Extract table information from these images. Return all data, including headings, "
@@ -11,8 +18,12 @@ DEFAULT_PROMPT = (
 )
 
 
+# google-generativeai only has a process-global key (genai.configure); remember which one is set.
+_legacy_api_key: str | None = None
+
+
 class GeminiClient:
-    def __init__(self, *, api_key: str, model_name: str):
+    def __init__(self, *, api_key: str, model_name: str, rpm: int = 0, tpm: int = 0):
         # Prefer the new SDK to avoid the deprecation warning:
         # - google-genai: import google.genai as genai
         # Fallback only if needed:
@@ -21,6 +32,10 @@ class GeminiClient:
         self._model = None
         self._client = None
         self._model_name = model_name
+        # Monotonic deadline until which this key is rate limited (used by GeminiKeyPool).
+        self.cooldown_until = 0.0
+        # Per-key budget (quotas are per project): shared by every document using this key.
+        self.rate_limiter = AsyncTokenBucket(rpm=rpm, tpm=tpm)
 
         try:
             import google.genai as genai  # type: ignore
@@ -33,29 +48,147 @@ class GeminiClient:
         # - genai.configure + genai.GenerativeModel (legacy-compatible)
         # - genai.Client (newer client style)
         if hasattr(genai, "configure") and hasattr(genai, "GenerativeModel"):
+            global _legacy_api_key
+            # A second key would silently replace the first for every client (no rotation).
+            if _legacy_api_key is not None and _legacy_api_key != api_key:
+                raise RuntimeError(
+                    "The google-generativeai SDK supports a single API key per process. "
+                    "Install 'google-genai' to use GEMINI_API_KEYS with more than one key."
+                )
             genai.configure(api_key=api_key)
+            _legacy_api_key = api_key
             self._model = genai.GenerativeModel(model_name)
         elif hasattr(genai, "Client"):
             self._client = genai.Client(api_key=api_key)
         else:  # pragma: no cover
             raise RuntimeError("Unsupported Gemini SDK. Please install 'google-genai'.")
 
-    async def extract_table_text(self, image: Image.Image, *, prompt: str = DEFAULT_PROMPT) -> str:
+    def close(self) -> None:
+        # google-genai keeps a pooled HTTP client; the legacy SDK has nothing to release.
+        if self._client is not None and hasattr(self._client, "close"):
+            self._client.close()
+
+    def _image_part(self, image: Image.Image | bytes, mime_type: str) -> object:
+        if not isinstance(image, bytes):
+            return image
+        # Already-encoded image: hand the bytes over as-is (no re-encode inside the SDK).
+        if self._model is not None:
+            return {"mime_type": mime_type, "data": image}
+        return self._genai.types.Part.from_bytes(data=image, mime_type=mime_type)  # type: ignore[union-attr]
+
+    async def extract_table_text(
+        self,
+        image: Image.Image | bytes,
+        *,
+        prompt: str = DEFAULT_PROMPT,
+        mime_type: str = "image/jpeg",
+    ) -> str:
         """
         Run model call in a worker thread to avoid blocking the event loop.
+        `image` is a PIL image or encoded image bytes (described by `mime_type`).
         """
 
         def _call() -> str:
+            part = self._image_part(image, mime_type)
             if self._model is not None:
-                resp = self._model.generate_content([prompt, image])
+                resp = self._model.generate_content([prompt, part])
                 return getattr(resp, "text", "") or ""
             # Client-style fallback (best-effort)
             resp = self._client.models.generate_content(  # type: ignore[union-attr]
                 model=self._model_name,
-                contents=[prompt, image],
+                contents=[prompt, part],
             )
             return getattr(resp, "text", "") or ""
 
         return await asyncio.to_thread(_call)
 
 
+class GeminiKeyPool:
+    """
+    Round-robin over clients for different API keys (quotas are per project, so keys from
+    separate projects add up). Every call, including failovers, waits on the chosen key's own
+    token bucket. A key that hits its quota cools down (and pauses its bucket) for the reported
+    retry window and calls move on to the next key; the error only surfaces once every key is cold.
+    """
+
+    def __init__(
+        self,
+        clients: list[GeminiClient],
+        *,
+        retry_after: Callable[[Exception], float | None] | None = None,
+    ):
+        if not clients:
+            raise ValueError("GeminiKeyPool needs at least one client.")
+        self._clients = clients
+        self._cycle = itertools.cycle(clients)
+        self._retry_after = retry_after
+
+    def _next_ready(self) -> GeminiClient | None:
+        now = time.monotonic()
+        for _ in range(len(self._clients)):
+            client = next(self._cycle)
+            if client.cooldown_until <= now:
+                return client
+        return None
+
+    async def extract_table_text(
+        self,
+        image: Image.Image | bytes,
+        *,
+        prompt: str = DEFAULT_PROMPT,
+        mime_type: str = "image/jpeg",
+        est_tokens: int = 0,
+    ) -> str:
+        last_err: Exception | None = None
+        for _ in range(len(self._clients)):
+            client = self._next_ready()
+            if client is None:
+                if last_err is not None:
+                    raise last_err
+                # Every key is cooling down: wait for the first one to come back.
+                client = min(self._clients, key=lambda c: c.cooldown_until)
+                await asyncio.sleep(max(0.0, client.cooldown_until - time.monotonic()))
+            # Waits for this key's budget and for any retry-after window another task opened on it.
+            await client.rate_limiter.acquire(est_tokens)
+            try:
+                return await client.extract_table_text(image, prompt=prompt, mime_type=mime_type)
+            except Exception as e:
+                retry_s = self._retry_after(e) if self._retry_after is not None else None
+                if retry_s is None:
+                    raise
+                # Quota window applies to every in-flight call on this key: pause them together.
+                client.cooldown_until = time.monotonic() + client.rate_limiter.pause(retry_s)
+                # Single-key pools leave the retry to the caller (the next call waits out the pause).
+                if len(self._clients) == 1:
+                    raise
+                last_err = e
+        assert last_err is not None
+        raise last_err
+
+
+# Clients handed out by get_gemini_client, so shutdown can close them.
+_cached_clients: list[GeminiClient] = []
+
+
+@lru_cache(maxsize=None)
+def get_gemini_client(api_key: str, model_name: str, rpm: int = 0, tpm: int = 0) -> GeminiClient:
+    """
+    Process-wide client per (api_key, model): keeps HTTP connections (and TLS sessions)
+    alive across chunks and documents instead of reconnecting for every upload.
+    `rpm` / `tpm` size the key's own rate-limit bucket (0 = unlimited).
+    """
+    client = GeminiClient(api_key=api_key, model_name=model_name, rpm=rpm, tpm=tpm)
+    _cached_clients.append(client)
+    return client
+
+
+def close_gemini_clients() -> None:
+    """Close every cached client (app shutdown)."""
+    global _legacy_api_key
+    get_gemini_client.cache_clear()
+    _legacy_api_key = None
+    while _cached_clients:
+        try:
+            _cached_clients.pop().close()
+        except Exception:  # pragma: no cover
+            pass
@@ -60,17 +60,22 @@ def row_confidence(row: list[str]) -> float:
     return max(0.0, min(1.0, non_empty / max(1, len(row))))
 
 
-def dedupe_consecutive_rows(rows: list[list[str]]) -> list[list[str]]:
+def dedupe_consecutive_rows(
+    rows: list[list[str]], *, drop: tuple[str, ...] | None = None
+) -> list[list[str]]:
     """
     Removes exact consecutive duplicates (common with overlap chunking).
+    Rows equal to `drop` (already-stripped cells, e.g. the previous chunk's last kept row)
+    are removed as well, without stripping every row a second time.
     """
     out: list[list[str]] = []
-    last: list[str] | None = None
+    last: tuple[str, ...] | None = None
     for r in rows:
-        normalized = [c.strip() for c in r]
-        if last is not None and normalized == last:
+        normalized = tuple(c.strip() for c in r)
+        if normalized == last:
             continue
-        out.append(r)
+        if normalized != drop:
+            out.append(r)
         last = normalized
     return out
 
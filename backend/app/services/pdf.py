@@ -1,42 +1,104 @@
 from __future__ import annotations
 
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
 from PIL import Image
 import fitz  # PyMuPDF
 
 
-def pdf_to_images(pdf_bytes: bytes, password: str | None = None, *, dpi: int = 300) -> list[Image.Image]:
-    """
-    Convert a PDF (in bytes) to a list of PIL Image objects (one per page).
-    If a password is provided and the PDF is encrypted, attempt to authenticate.
-    """
-    doc = fitz.open("pdf", pdf_bytes)
+def _open_pdf(pdf: bytes | str, password: str | None = None) -> fitz.Document:
+    # `pdf` is either the raw bytes or a path (MuPDF then reads the file lazily).
+    doc = fitz.open(pdf, filetype="pdf") if isinstance(pdf, str) else fitz.open("pdf", pdf)
     if doc.is_encrypted:
         if not password:
+            doc.close()
             raise ValueError("PDF is encrypted and requires a password.")
         if not doc.authenticate(password):
+            doc.close()
             raise ValueError("Incorrect password for encrypted PDF.")
+    return doc
+
+
+# Per-process document handle for render workers (MuPDF documents can't be shared across processes).
+_worker_doc: fitz.Document | None = None
+
 
+def _init_render_worker(pdf: bytes | str, password: str | None) -> None:
+    global _worker_doc
+    _worker_doc = _open_pdf(pdf, password)
+
+
+def _pixmap_samples(doc: fitz.Document, page_number: int, zoom: float) -> tuple[int, int, bytes]:
+    page = doc.load_page(page_number)
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    return pix.width, pix.height, pix.samples
+
+
+def _render_page(page_number: int, zoom: float) -> tuple[int, int, bytes]:
+    assert _worker_doc is not None
+    return _pixmap_samples(_worker_doc, page_number, zoom)
+
+
+def pdf_to_arrays(
+    pdf: bytes | str,
+    password: str | None = None,
+    *,
+    dpi: int = 300,
+    max_workers: int | None = None,
+) -> list[np.ndarray]:
+    """
+    Convert a PDF (bytes or file path) to one read-only RGB array (H x W x 3, uint8) per page.
+    If a password is provided and the PDF is encrypted, attempt to authenticate.
+    Pages are rasterized in a process pool (`max_workers`, default: CPU count; 1 = in-process).
+    """
     # PyMuPDF default rasterization is ~72 DPI; for legal-tech accuracy we render higher.
     # zoom = dpi / 72
     zoom = max(1.0, float(dpi) / 72.0)
-    mat = fitz.Matrix(zoom, zoom)
 
-    images: list[Image.Image] = []
-    for page_number in range(len(doc)):
-        page = doc.load_page(page_number)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        images.append(image)
-    return images
+    with _open_pdf(pdf, password) as doc:
+        num_pages = doc.page_count
+        workers = min(max_workers or os.cpu_count() or 1, num_pages)
+        if workers <= 1:
+            rendered = [_pixmap_samples(doc, n, zoom) for n in range(num_pages)]
 
+    if workers > 1:
+        # spawn: forking a multi-threaded server process is unsafe.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_render_worker,
+            # Passing a path lets each worker open the file itself instead of receiving the bytes.
+            initargs=(pdf, password),
+        ) as pool:
+            rendered = list(pool.map(_render_page, range(num_pages), repeat(zoom)))
 
-def pdf_num_pages(pdf_bytes: bytes, password: str | None = None) -> int:
-    doc = fitz.open("pdf", pdf_bytes)
-    if doc.is_encrypted:
-        if not password:
-            raise ValueError("PDF is encrypted and requires a password.")
-        if not doc.authenticate(password):
-            raise ValueError("Incorrect password for encrypted PDF.")
-    return len(doc)
+    # `samples` is an owned bytes copy of the pixmap, so a view over it is safe (no extra copy).
+    return [np.frombuffer(samples, dtype=np.uint8).reshape(h, w, 3) for w, h, samples in rendered]
+
+
+def pdf_to_images(
+    pdf: bytes | str,
+    password: str | None = None,
+    *,
+    dpi: int = 300,
+    max_workers: int | None = None,
+) -> list[Image.Image]:
+    """
+    Convert a PDF (bytes or file path) to a list of PIL Image objects (one per page).
+    See `pdf_to_arrays`, which avoids building PIL images up front.
+    """
+    arrays = pdf_to_arrays(pdf, password, dpi=dpi, max_workers=max_workers)
+    return [Image.fromarray(arr) for arr in arrays]
+
+
+def pdf_num_pages(pdf: bytes | str, password: str | None = None) -> int:
+    # MuPDF only needs the xref/page tree for this (sub-ms even for large files,
+    # far cheaper than pure-Python readers); close it right away to free the handle.
+    with _open_pdf(pdf, password) as doc:
+        return doc.page_count
 
 
@@ -1,18 +1,30 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import io
+import multiprocessing
 import os
 import re
 import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timezone
+from typing import Callable, TypeVar
 from uuid import uuid4
 
+import numpy as np
 from PIL import Image
 
+try:
+    import imagecodecs
+except ImportError:  # pragma: no cover
+    imagecodecs = None  # type: ignore[assignment]
+
+from app.core import jsonio
 from app.core.config import settings
-from app.services.chunking import iter_vertical_chunks
-from app.services.gemini import GeminiClient, DEFAULT_PROMPT
+from app.services.chunking import ImageChunk, iter_vertical_chunks
+from app.services.gemini import DEFAULT_PROMPT, GeminiKeyPool, get_gemini_client
 from app.services.parsing import (
     parse_extracted_text,
     adjust_table_rows,
@@ -23,6 +35,9 @@ from app.storage.filesystem import FilesystemStorage
 from app.storage.progress import InMemoryProgressStore
 
 
+_T = TypeVar("_T")
+
+
 def new_document_id() -> str:
     return uuid4().hex
 
@@ -31,40 +46,127 @@ def _utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+# File helpers trust the caller: document_paths() creates the document dirs, and per-page
+# chunk/raw dirs are created once when a page starts.
 def _write_json(path: str, payload: object) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    data = memoryview(jsonio.dumps(payload, indent=True))
+    # Already-encoded bytes: write them with raw fd calls (no buffered file object).
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
 
 
 def _write_bytes(path: str, data: bytes) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "wb") as f:
         f.write(data)
 
 
 def _write_text(path: str, text: str) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "w", encoding="utf-8") as f:
         f.write(text or "")
 
 
-def _save_png(img: Image.Image, path: str, *, compress_level: int = 1) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    # Lower compression = faster CPU, larger files (good tradeoff for pipelines).
-    img.save(path, format="PNG", compress_level=int(compress_level))
+def _append_ndjson(path: str, items: list[dict]) -> None:
+    with open(path, "ab") as f:
+        f.write(b"".join([jsonio.dumps(item) + b"\n" for item in items]))
 
 
-def _downscale_for_gemini(img: Image.Image) -> Image.Image:
+def _seal_global_json(path: str, rows_path: str, *, document_id: str, header: list[str]) -> None:
+    """
+    Assemble global.json from the streamed rows file without loading every row at once.
+    Written under a temp name so readers never see a partial file; the rows file is then removed.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as out, open(rows_path, "rb") as rows:
+        out.write(
+            b'{"document_id":' + jsonio.dumps(document_id) + b',"header":' + jsonio.dumps(header) + b',"rows":['
+        )
+        sep = b""
+        for line in rows:
+            line = line.rstrip(b"\n")
+            if line:
+                out.write(sep + line)
+                sep = b","
+        out.write(b'],"generated_at":' + jsonio.dumps(_utc_iso()) + b"}")
+    os.replace(tmp_path, path)
+    os.remove(rows_path)
+
+
+def _make_dirs(dirs: list[str]) -> None:
+    for d in dirs:
+        os.makedirs(d, exist_ok=True)
+
+
+def _save_png(img: Image.Image | np.ndarray, path: str, *, compress_level: int = 1) -> None:
+    if imagecodecs is not None:
+        # Encodes straight from the pixel buffer and releases the GIL during deflate.
+        arr = np.asarray(img)
+        with open(path, "wb") as f:
+            f.write(imagecodecs.png_encode(arr, level=int(compress_level)))
+        return
+    if isinstance(img, np.ndarray):
+        img = Image.fromarray(img)
+    # Lower compression = faster CPU, larger files (good tradeoff for pipelines).
+    # optimize=False keeps PIL from searching for a smaller encoding (extra deflate passes).
+    img.save(path, format="PNG", compress_level=int(compress_level), optimize=False)
+
+
+def _encode_image(img: Image.Image, *, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "png":
+        img.save(buf, format="PNG", compress_level=settings.png_compress_level, optimize=False)
+    else:
+        # libjpeg-turbo baseline encode: much cheaper than PNG deflate for pipeline intermediates.
+        # Rendered pages are already RGB; convert() would only make a full copy of the pixels.
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img.save(
+            buf, format="JPEG", quality=settings.chunk_jpeg_quality, optimize=False, progressive=False
+        )
+    return buf.getvalue()
+
+
+def _downscale_for_gemini(page: np.ndarray) -> tuple[np.ndarray, float]:
     """
     Reduce image size before sending to the model. This improves latency and reduces upload cost.
+    Resamples the whole page once; chunks are then sliced from the result (one resample per page
+    instead of one per overlapping chunk). Returns the page and the applied scale factor.
     """
     max_w = int(getattr(settings, "max_chunk_width", 0) or 0)
-    if max_w <= 0 or img.width <= max_w:
-        return img
-    ratio = max_w / float(img.width)
-    new_h = max(1, int(round(img.height * ratio)))
-    return img.resize((max_w, new_h), Image.LANCZOS)
+    height, width = page.shape[:2]
+    if max_w <= 0 or width <= max_w:
+        return page, 1.0
+    # Bilinear is much cheaper and reads the same for the model at mild ratios; below 0.5x
+    # (heavy downsample) Lanczos keeps thin table rules and small glyphs from breaking up.
+    ratio = max_w / float(width)
+    if settings.downscale_filter == "lanczos" or ratio < 0.5:
+        resample = Image.Resampling.LANCZOS
+    else:
+        resample = Image.Resampling.BILINEAR
+    img = Image.fromarray(page)
+    img.thumbnail((max_w, 10**9), resample)
+    return np.asarray(img), img.height / float(height)
+
+
+def _scaled_chunk(page: np.ndarray, chunk: ImageChunk, ratio: float) -> np.ndarray:
+    # Map the chunk's full-resolution row range onto the downscaled page.
+    top = int(chunk.top * ratio)
+    bottom = max(top + 1, int(round(chunk.bottom * ratio)))
+    return page[top:bottom]
+
+
+def _estimate_call_tokens(pixels: np.ndarray, prompt: str) -> int:
+    # Rough input estimate for the TPM budget: ~258 tokens per 768px image tile plus the prompt.
+    height, width = pixels.shape[:2]
+    tiles = -(-width // 768) * -(-height // 768)
+    return 258 * tiles + len(prompt) // 4
+
+
+def _prepare_chunk_image(pixels: np.ndarray, fmt: str) -> bytes:
+    return _encode_image(Image.fromarray(pixels), fmt=fmt)
 
 
 def _row_bbox_for_chunk(*, page_width: int, top: int, bottom: int, idx: int, n: int) -> dict:
@@ -75,17 +177,80 @@ def _row_bbox_for_chunk(*, page_width: int, top: int, bottom: int, idx: int, n:
     y1 = int(round(min(bottom, top + (idx + 1) * h)))
     return {"x0": 0, "y0": y0, "x1": int(page_width), "y1": int(y1)}
 
+
+def _parse_page(
+    page_number: int,
+    page_width: int,
+    chunk_spans: list[tuple[int, int, int]],
+    chunk_texts: list[str],
+) -> tuple[list[str], list[list[str]], list[dict]]:
+    """
+    Parse/merge one page's chunk outputs (in chunk order) into (header, rows, row_metadata).
+    `chunk_spans` holds (chunk_index, top, bottom) per chunk. Module-level so it can run in
+    the parse process pool.
+    """
+    header: list[str] | None = None
+    normalized_header: list[str] = []
+    # Stripped cells of the last kept row, for dropping overlap repeats from the next chunk.
+    last_stripped: tuple[str, ...] | None = None
+    page_rows: list[list[str]] = []
+    page_row_meta: list[dict] = []
+    for (chunk_index, top, bottom), chunk_text in zip(chunk_spans, chunk_texts):
+        parsed = parse_extracted_text(chunk_text, delimiter="|")
+        if not parsed:
+            continue
+
+        if header is None:
+            header = parsed[0]
+            normalized_header = [h.strip() for h in header]
+            data_rows = parsed[1:]
+        else:
+            candidate = [c.strip() for c in parsed[0]]
+            if candidate == normalized_header:
+                data_rows = parsed[1:]
+            else:
+                data_rows = parsed
+
+        data_rows = adjust_table_rows(header, data_rows) if header else data_rows
+
+        # Dedupe overlap (exact consecutive duplicates, and repeats of the previous chunk's last row)
+        kept = dedupe_consecutive_rows(data_rows, drop=last_stripped)
+        if kept:
+            last_stripped = tuple(c.strip() for c in kept[-1])
+
+        n = len(kept)
+        for i, row in enumerate(kept):
+            bbox = _row_bbox_for_chunk(page_width=page_width, top=top, bottom=bottom, idx=i, n=n)
+            conf = row_confidence(row)
+            page_rows.append(row)
+            page_row_meta.append(
+                {
+                    "page_number": page_number,
+                    "chunk_index": chunk_index,
+                    "bbox": bbox,
+                    "confidence": conf,
+                }
+            )
+
+    return header or [], page_rows, page_row_meta
+
+
+# Example seen in logs: "Please retry in 31.184393644s."
+_RETRY_RE = re.compile(r"retry in\s+([0-9]+(?:\.[0-9]+)?)s", re.IGNORECASE)
+# Message fragments that identify Gemini quota errors.
+_QUOTA_MARKERS = ("Quota exceeded", "exceeded your current quota")
+
+
 def _friendly_error_message(err: Exception) -> str:
     msg = str(err) or err.__class__.__name__
     # Surface Gemini quota issues clearly.
-    if "ResourceExhausted" in err.__class__.__name__ or "Quota exceeded" in msg or "exceeded your current quota" in msg:
+    if "ResourceExhausted" in err.__class__.__name__ or any(m in msg for m in _QUOTA_MARKERS):
         return "Gemini rate limit/quota exceeded. Please wait a bit and try again (or upgrade billing/limits)."
     return msg
 
 
 def _parse_retry_seconds(msg: str) -> float | None:
-    # Example seen in logs: "Please retry in 31.184393644s."
-    m = re.search(r"retry in\s+([0-9]+(?:\.[0-9]+)?)s", msg, flags=re.IGNORECASE)
+    m = _RETRY_RE.search(msg)
     if not m:
         return None
     try:
@@ -94,6 +259,34 @@ def _parse_retry_seconds(msg: str) -> float | None:
         return None
 
 
+async def _run_file_writer(queue: asyncio.Queue[tuple[Callable[..., None], tuple] | None]) -> None:
+    """
+    Run queued (write_fn, args) jobs in order until a None sentinel arrives.
+    Encoding and file I/O run in a worker thread, off the page loop's critical path.
+    """
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        fn, args = item
+        await asyncio.to_thread(fn, *args)
+
+
+async def run_processing_worker(processor: DocumentProcessor, queue: asyncio.Queue[dict]) -> None:
+    """
+    Consume upload jobs (keyword arguments for `process_pdf_file`) until cancelled.
+    """
+    while True:
+        job = await queue.get()
+        try:
+            await processor.process_pdf_file(**job)
+        except Exception:
+            # process_pdf_file records failures in the progress store; keep the worker alive.
+            traceback.print_exc()
+        finally:
+            queue.task_done()
+
+
 class DocumentProcessor:
     """
     Orchestrates the end-to-end pipeline and persists outputs to filesystem storage.
@@ -102,6 +295,34 @@ class DocumentProcessor:
     def __init__(self, *, storage: FilesystemStorage, progress: InMemoryProgressStore):
         self.storage = storage
         self.progress = progress
+        # Parsing is pure-Python CPU work; a process pool keeps it off the event loop's GIL.
+        # Workers start lazily on first use (spawn: forking a threaded server is unsafe).
+        self._parse_workers = settings.parse_workers or os.cpu_count() or 1
+        self._parse_pool: ProcessPoolExecutor | None = self._new_parse_pool()
+
+    def _new_parse_pool(self) -> ProcessPoolExecutor | None:
+        if self._parse_workers <= 1:
+            return None
+        return ProcessPoolExecutor(max_workers=self._parse_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def close(self) -> None:
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+            self._parse_pool = None
+
+    async def _run_parse(self, fn: Callable[..., _T], *args: object) -> _T:
+        pool = self._parse_pool
+        if pool is None:
+            return fn(*args)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (OOM kill, segfault): replace the pool once (concurrent callers may
+            # all see the same broken one) and parse this call in-process.
+            if self._parse_pool is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._parse_pool = self._new_parse_pool()
+            return fn(*args)
 
     async def process_pdf_bytes(
         self,
@@ -112,27 +333,76 @@ class DocumentProcessor:
         chunk_height: int = 500,
         overlap: int = 50,
         prompt: str = DEFAULT_PROMPT,
+    ) -> None:
+        """Run the pipeline on in-memory PDF bytes (saved as the document's original.pdf)."""
+        await self._process_pdf(
+            document_id=document_id,
+            pdf=pdf_bytes,
+            pdf_password=pdf_password,
+            chunk_height=chunk_height,
+            overlap=overlap,
+            prompt=prompt,
+        )
+
+    async def process_pdf_file(
+        self,
+        *,
+        document_id: str,
+        pdf_path: str,
+        pdf_password: str | None,
+        chunk_height: int = 500,
+        overlap: int = 50,
+        prompt: str = DEFAULT_PROMPT,
+    ) -> None:
+        """Run the pipeline on a PDF already on disk (e.g. the streamed upload)."""
+        await self._process_pdf(
+            document_id=document_id,
+            pdf=pdf_path,
+            pdf_password=pdf_password,
+            chunk_height=chunk_height,
+            overlap=overlap,
+            prompt=prompt,
+        )
+
+    async def _process_pdf(
+        self,
+        *,
+        document_id: str,
+        pdf: bytes | str,
+        pdf_password: str | None,
+        chunk_height: int,
+        overlap: int,
+        prompt: str,
     ) -> None:
         paths = self.storage.document_paths(document_id)
 
         try:
-            if not settings.gemini_api_key:
+            if not settings.gemini_api_keys:
                 self.progress.update(
                     document_id,
                     state="failed",
-                    message="Missing GEMINI_API_KEY environment variable.",
+                    message="Missing GEMINI_API_KEY (or GEMINI_API_KEYS) environment variable.",
                     progress=0,
                 )
                 return
 
-            from app.services.pdf import pdf_to_images  # local import to keep service boundaries clean
+            from app.services.pdf import pdf_to_arrays  # local import to keep service boundaries clean
 
             self.progress.update(document_id, state="processing", message=None)
 
-            # Save original (off the event loop)
-            await asyncio.to_thread(_write_bytes, paths.pdf_path, pdf_bytes)
-
-            images = pdf_to_images(pdf_bytes, password=pdf_password, dpi=settings.pdf_render_dpi)
+            # Save original (off the event loop) unless it's already the file on disk.
+            if isinstance(pdf, bytes):
+                await asyncio.to_thread(_write_bytes, paths.pdf_path, pdf)
+
+            # Rendering blocks for the whole document; keep it off the event loop so other
+            # documents' Gemini calls and status requests keep flowing.
+            images = await asyncio.to_thread(
+                pdf_to_arrays,
+                pdf,
+                password=pdf_password,
+                dpi=settings.pdf_render_dpi,
+                max_workers=settings.pdf_render_workers or None,
+            )
             total_pages = len(images)
 
             # Precompute total chunks for progress.
@@ -149,31 +419,50 @@ class DocumentProcessor:
 
             self.progress.update(document_id, total_pages=total_pages, total_chunks=total_chunks)
 
-            gemini = GeminiClient(api_key=settings.gemini_api_key, model_name=settings.gemini_model)
+            gemini = GeminiKeyPool(
+                [
+                    get_gemini_client(key, settings.gemini_model, settings.gemini_rpm, settings.gemini_tpm)
+                    for key in settings.gemini_api_keys
+                ],
+                retry_after=lambda e: _parse_retry_seconds(str(e)),
+            )
 
             global_header: list[str] | None = None
-            global_rows: list[dict] = []
+            # Global rows are streamed to a scratch global.ndjson page by page (memory stays
+            # O(one page)); global.json is assembled from it at the end, then it is deleted.
+            global_rows_path = os.path.join(paths.tables_dir, "global.ndjson")
 
             chunk_counter = 0
+            last_pct = -1
 
             sem = asyncio.Semaphore(max(1, int(getattr(settings, "gemini_concurrency", 1) or 1)))
+            chunk_fmt = "png" if settings.chunk_format == "png" else "jpeg"
+            chunk_ext, chunk_mime = ("png", "image/png") if chunk_fmt == "png" else ("jpg", "image/jpeg")
 
-            async def _extract_with_retries(img: Image.Image, *, chunk_label: str) -> str:
+            async def _extract_with_retries(data: bytes, *, chunk_label: str, est_tokens: int) -> str:
                 max_attempts = 6
                 base_wait = 2.0
                 last_err: Exception | None = None
 
                 for attempt in range(1, max_attempts + 1):
                     try:
-                        txt = await gemini.extract_table_text(img, prompt=prompt)
-                        # Clear transient message if any
-                        self.progress.update(document_id, message=None)
+                        # The pool paces each call on its key's bucket (and its retry-after window).
+                        txt = await gemini.extract_table_text(
+                            data, prompt=prompt, mime_type=chunk_mime, est_tokens=est_tokens
+                        )
+                        # Clear the transient rate-limit message set by an earlier attempt
+                        if attempt > 1:
+                            self.progress.update(document_id, message=None)
                         return txt
                     except Exception as e:
                         last_err = e
                         # Detect Gemini quota errors (google.api_core.exceptions.ResourceExhausted)
                         retry_s = _parse_retry_seconds(str(e))
-                        wait_s = retry_s if retry_s is not None else min(60.0, base_wait * (2 ** (attempt - 1)))
+                        if retry_s is not None:
+                            # The pool already paused the key(s); the next attempt waits that out.
+                            wait_s = retry_s
+                        else:
+                            wait_s = min(60.0, base_wait * (2 ** (attempt - 1)))
                         # Update status so frontend doesn't look "stuck"
                         self.progress.update(
                             document_id,
@@ -182,13 +471,15 @@ class DocumentProcessor:
                                 f"(attempt {attempt}/{max_attempts})…"
                             ),
                         )
-                        await asyncio.sleep(wait_s)
+                        if retry_s is None:
+                            await asyncio.sleep(wait_s)
 
                 # exhausted retries
                 assert last_err is not None
                 raise last_err
 
-            for page_idx, page_img in enumerate(images, start=1):
+            async def _extract_page(page_idx: int, page_img: np.ndarray) -> dict[int, str]:
+                nonlocal chunk_counter, last_pct
                 self.progress.update(document_id, current_page=page_idx, current_chunk=None)
 
                 # Save page image (optional; kept ON by default because /pages/{n}/image serves it)
@@ -198,43 +489,49 @@ class DocumentProcessor:
                         _save_png,
                         page_img,
                         page_path,
-                        compress_level=int(getattr(settings, "png_compress_level", 1) or 1),
+                        compress_level=settings.png_compress_level,
                     )
 
-                header: list[str] | None = None
-                page_rows: list[list[str]] = []
-                page_row_meta: list[dict] = []
-
                 chunks = per_page_chunks[page_idx - 1]
-                page_width, _page_height = page_img.size
+                gemini_page, gemini_ratio = await asyncio.to_thread(_downscale_for_gemini, page_img)
+
+                # Optional debug outputs: create their per-page dirs once, not per chunk write.
+                chunk_dir = os.path.join(paths.chunks_dir, f"page_{page_idx}")
+                raw_dir = os.path.join(paths.raw_dir, f"page_{page_idx}")
+                page_dirs = [
+                    d
+                    for d, enabled in (
+                        (chunk_dir, getattr(settings, "save_chunk_images", False)),
+                        (raw_dir, getattr(settings, "save_raw_chunks", False)),
+                    )
+                    if enabled
+                ]
+                if page_dirs:
+                    await asyncio.to_thread(_make_dirs, page_dirs)
 
                 async def _extract_one_chunk(chunk) -> tuple[int, str]:
+                    # Encode once (off the loop); the same bytes go to Gemini and, if enabled, to disk.
+                    pixels = _scaled_chunk(gemini_page, chunk, gemini_ratio)
+                    data = await asyncio.to_thread(_prepare_chunk_image, pixels, chunk_fmt)
+
                     # Optional: persist chunk image (very expensive; OFF by default)
                     if getattr(settings, "save_chunk_images", False):
-                        chunk_dir = os.path.join(paths.chunks_dir, f"page_{page_idx}")
-                        chunk_img_path = os.path.join(chunk_dir, f"chunk_{chunk.chunk_index}.png")
-                        await asyncio.to_thread(
-                            _save_png,
-                            chunk.image,
-                            chunk_img_path,
-                            compress_level=int(getattr(settings, "png_compress_level", 1) or 1),
-                        )
-
-                    img_for_gemini = _downscale_for_gemini(chunk.image)
+                        chunk_img_path = os.path.join(chunk_dir, f"chunk_{chunk.chunk_index}.{chunk_ext}")
+                        await asyncio.to_thread(_write_bytes, chunk_img_path, data)
 
                     async with sem:
                         txt = await _extract_with_retries(
-                            img_for_gemini,
+                            data,
                             chunk_label=f"page {page_idx} chunk {chunk.chunk_index}",
+                            est_tokens=_estimate_call_tokens(pixels, prompt),
                         )
 
                     # Optional: persist raw model output (expensive; OFF by default)
                     if getattr(settings, "save_raw_chunks", False):
-                        raw_dir = os.path.join(paths.raw_dir, f"page_{page_idx}")
                         raw_path = os.path.join(raw_dir, f"chunk_{chunk.chunk_index}.txt")
                         await asyncio.to_thread(_write_text, raw_path, txt)
 
-                    return int(chunk.chunk_index), (txt or "")
+                    return chunk.chunk_index, txt
 
                 # 1) Extract text for all chunks with bounded parallelism.
                 tasks = [asyncio.create_task(_extract_one_chunk(c)) for c in chunks]
@@ -244,88 +541,72 @@ class DocumentProcessor:
                         idx, txt = await fut
                         chunk_text_by_index[idx] = txt
                         chunk_counter += 1
-                        self.progress.update(
-                            document_id,
-                            current_chunk=idx,
-                            progress=int(round((chunk_counter / max(1, total_chunks)) * 100)),
-                        )
-                except Exception:
+                        pct = (chunk_counter * 100) // max(1, total_chunks)
+                        # Only publish when the percentage moves, and at most ~10 times a second.
+                        if pct != last_pct and self.progress.update(
+                            document_id, throttle=True, current_chunk=idx, progress=pct
+                        ):
+                            last_pct = pct
+                except BaseException:
+                    # Includes cancellation of this page by the pipeline (another page failed).
                     for t in tasks:
                         t.cancel()
                     await asyncio.gather(*tasks, return_exceptions=True)
                     raise
                 finally:
-                    self.progress.update(document_id, current_chunk=None)
-
-                # 2) Parse/merge sequentially in chunk order for stable dedupe behavior.
-                for chunk in chunks:
-                    chunk_text = chunk_text_by_index.get(int(chunk.chunk_index), "") or ""
-
-                    parsed = parse_extracted_text(chunk_text, delimiter="|")
-                    if not parsed:
-                        continue
-
-                    if header is None:
-                        header = parsed[0]
-                        data_rows = parsed[1:]
-                    else:
-                        normalized_header = [h.strip() for h in header]
-                        candidate = [c.strip() for c in parsed[0]]
-                        if candidate == normalized_header:
-                            data_rows = parsed[1:]
-                        else:
-                            data_rows = parsed
-
-                    data_rows = adjust_table_rows(header, data_rows) if header else data_rows
-
-                    # Dedupe overlap (exact consecutive duplicates)
-                    deduped = dedupe_consecutive_rows(data_rows)
-                    kept: list[list[str]] = []
-                    for r in deduped:
-                        if page_rows and [c.strip() for c in r] == [c.strip() for c in page_rows[-1]]:
-                            continue
-                        kept.append(r)
-
-                    n = len(kept)
-                    for i, row in enumerate(kept):
-                        bbox = _row_bbox_for_chunk(
-                            page_width=page_width, top=chunk.top, bottom=chunk.bottom, idx=i, n=n
-                        )
-                        conf = row_confidence(row)
-                        page_rows.append(row)
-                        page_row_meta.append(
-                            {
-                                "page_number": page_idx,
-                                "chunk_index": chunk.chunk_index,
-                                "bbox": bbox,
-                                "confidence": conf,
-                            }
-                        )
+                    # Flush whatever the throttle held back, so the bar never lags a finished page.
+                    last_pct = (chunk_counter * 100) // max(1, total_chunks)
+                    self.progress.update(document_id, current_chunk=None, progress=last_pct)
+                return chunk_text_by_index
+
+            # Extraction (network-bound) runs ahead of parsing (CPU-bound): up to `pipeline_depth`
+            # pages are in flight, so page N is parsed while page N+1's chunks are already being
+            # extracted. Pages are still parsed strictly in order.
+            depth = max(1, int(getattr(settings, "pipeline_depth", 2) or 1))
+            pending: deque[asyncio.Task[dict[int, str]]] = deque()
+            next_page = 0
+            # Per-page JSON is written in the background; drained before global.json / "completed".
+            file_writes: asyncio.Queue[tuple[Callable[..., None], tuple] | None] = asyncio.Queue()
+            file_writer = asyncio.create_task(_run_file_writer(file_writes))
+            file_writes.put_nowait((_write_bytes, (global_rows_path, b"")))
+            try:
+                for page_idx, page_img in enumerate(images, start=1):
+                    while len(pending) < depth and next_page < len(images):
+                        pending.append(asyncio.create_task(_extract_page(next_page + 1, images[next_page])))
+                        next_page += 1
+                    chunk_text_by_index = await pending.popleft()
+
+                    chunks = per_page_chunks[page_idx - 1]
+                    _page_height, page_width = page_img.shape[:2]
+
+                    # 2) Parse/merge sequentially in chunk order for stable dedupe behavior.
+                    #    CPU-bound: runs in the parse pool (if any) so the loop keeps issuing Gemini calls.
+                    header, page_rows, page_row_meta = await self._run_parse(
+                        _parse_page,
+                        page_idx,
+                        page_width,
+                        [(c.chunk_index, c.top, c.bottom) for c in chunks],
+                        [chunk_text_by_index.get(c.chunk_index, "") for c in chunks],
+                    )
 
-                if header is None:
-                    header = []
-
-                # Save per-page table JSON
-                page_table_payload = {
-                    "document_id": document_id,
-                    "page_number": page_idx,
-                    "header": header,
-                    "rows": page_rows,
-                    "row_metadata": page_row_meta,
-                    "generated_at": _utc_iso(),
-                }
-                await asyncio.to_thread(
-                    _write_json,
-                    os.path.join(paths.tables_dir, f"page_{page_idx}.json"),
-                    page_table_payload,
-                )
+                    # Save per-page table JSON
+                    page_table_payload = {
+                        "document_id": document_id,
+                        "page_number": page_idx,
+                        "header": header,
+                        "rows": page_rows,
+                        "row_metadata": page_row_meta,
+                        "generated_at": _utc_iso(),
+                    }
+                    file_writes.put_nowait(
+                        (_write_json, (os.path.join(paths.tables_dir, f"page_{page_idx}.json"), page_table_payload))
+                    )
 
-                # Append to global
-                if global_header is None and header:
-                    global_header = header
+                    # Append to global
+                    if global_header is None and header:
+                        global_header = header
 
-                for r_idx, (row, meta) in enumerate(zip(page_rows, page_row_meta)):
-                    global_rows.append(
+                    global_page_rows = [
                         {
                             "page_number": page_idx,
                             "row_index_on_page": r_idx,
@@ -333,24 +614,32 @@ class DocumentProcessor:
                             "confidence": float(meta.get("confidence", 0.0)),
                             "bbox": meta.get("bbox"),
                         }
-                    )
-
-            global_payload = {
-                "document_id": document_id,
-                "header": global_header or [],
-                "rows": global_rows,
-                "generated_at": _utc_iso(),
-            }
-            await asyncio.to_thread(_write_json, os.path.join(paths.tables_dir, "global.json"), global_payload)
+                        for r_idx, (row, meta) in enumerate(zip(page_rows, page_row_meta))
+                    ]
+                    file_writes.put_nowait((_append_ndjson, (global_rows_path, global_page_rows)))
+
+                file_writes.put_nowait(None)
+                await file_writer  # re-raises any write error
+            except BaseException:
+                for t in (*pending, file_writer):
+                    t.cancel()
+                await asyncio.gather(*pending, file_writer, return_exceptions=True)
+                raise
+
+            await asyncio.to_thread(
+                _seal_global_json,
+                os.path.join(paths.tables_dir, "global.json"),
+                global_rows_path,
+                document_id=document_id,
+                header=global_header or [],
+            )
 
             self.progress.update(document_id, state="completed", current_chunk=None, current_page=None, progress=100, message=None)
         except Exception as e:
             # Persist error details for debugging
             try:
-                os.makedirs(paths.raw_dir, exist_ok=True)
-                with open(os.path.join(paths.raw_dir, "error.txt"), "w", encoding="utf-8") as f:
-                    f.write(_friendly_error_message(e) + "\n\n")
-                    f.write(traceback.format_exc())
+                details = _friendly_error_message(e) + "\n\n" + traceback.format_exc()
+                await asyncio.to_thread(_write_text, os.path.join(paths.raw_dir, "error.txt"), details)
             except Exception:
                 pass
 
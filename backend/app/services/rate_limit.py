@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+
+
+class AsyncTokenBucket:
+    """
+    Proactive pacing for model calls, shared by every document in the process.
+
+    - `rpm` / `tpm` are per-minute request / token budgets (0 = unlimited); both refill continuously.
+    - `pause(seconds)` opens a shared retry-after window (e.g. after a 429) that every caller of
+      `acquire` observes, so concurrent tasks wait out one window instead of each backing off alone.
+    """
+
+    def __init__(self, *, rpm: int = 0, tpm: int = 0):
+        self._rpm = max(0, int(rpm))
+        self._tpm = max(0, int(tpm))
+        self._requests = float(self._rpm)
+        self._tokens = float(self._tpm)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._resume = asyncio.Event()
+        self._resume.set()
+        self._resume_handle: asyncio.TimerHandle | None = None
+        # FIFO: waiters are served in arrival order while the bucket refills.
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        if self._rpm:
+            self._requests = min(float(self._rpm), self._requests + elapsed * self._rpm / 60.0)
+        if self._tpm:
+            self._tokens = min(float(self._tpm), self._tokens + elapsed * self._tpm / 60.0)
+
+    def _wait_seconds(self, tokens: float) -> float:
+        wait = 0.0
+        if self._rpm and self._requests < 1.0:
+            wait = (1.0 - self._requests) * 60.0 / self._rpm
+        if self._tpm and self._tokens < tokens:
+            wait = max(wait, (tokens - self._tokens) * 60.0 / self._tpm)
+        return wait
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until a request (estimated at `tokens` tokens) fits the budget, then consume it."""
+        # A single call larger than the whole minute budget can only ever wait for a full bucket.
+        need = float(min(max(0, tokens), self._tpm)) if self._tpm else 0.0
+        async with self._lock:
+            while True:
+                await self._resume.wait()
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._wait_seconds(need)
+                if wait <= 0.0:
+                    break
+                await asyncio.sleep(wait)
+            if self._rpm:
+                self._requests -= 1.0
+            if self._tpm:
+                self._tokens -= need
+
+    def pause(self, seconds: float) -> float:
+        """
+        Hold every `acquire` for about `seconds` (jittered +-20% so callers don't retry in lockstep).
+        Returns the applied delay; a shorter window never cuts an open one short.
+        """
+        delay = max(0.0, float(seconds)) * random.uniform(0.8, 1.2)
+        until = time.monotonic() + delay
+        if until <= self._paused_until:
+            return self._paused_until - time.monotonic()
+
+        self._paused_until = until
+        self._resume.clear()
+        if self._resume_handle is not None:
+            self._resume_handle.cancel()
+        self._resume_handle = asyncio.get_running_loop().call_later(delay, self._end_pause)
+        return delay
+
+    def _end_pause(self) -> None:
+        self._resume_handle = None
+        self._resume.set()
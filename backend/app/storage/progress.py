@@ -4,6 +4,7 @@ from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Literal
 import threading
+import time
 
 
 DocumentState = Literal["queued", "processing", "completed", "failed"]
@@ -33,9 +34,13 @@ class InMemoryProgressStore:
     Replace with Redis/Postgres for multi-worker / multi-instance deployments.
     """
 
+    # Minimum spacing between throttled updates (progress ticks); state changes always apply.
+    min_update_interval_s = 0.1
+
     def __init__(self):
         self._lock = threading.Lock()
         self._data: dict[str, ProgressState] = {}
+        self._last_update: dict[str, float] = {}
 
     def create(self, document_id: str, *, total_pages: int | None = None) -> ProgressState:
         with self._lock:
@@ -44,16 +49,23 @@ class InMemoryProgressStore:
             return state
 
     def get(self, document_id: str) -> ProgressState | None:
-        with self._lock:
-            return self._data.get(document_id)
-
-    def update(self, document_id: str, **kwargs) -> ProgressState:
-        with self._lock:
-            state = self._data[document_id]
-            for k, v in kwargs.items():
-                setattr(state, k, v)
-            state.updated_at = utcnow()
-            self._data[document_id] = state
-            return state
-
+        return self._data.get(document_id)
 
+    def update(self, document_id: str, *, throttle: bool = False, **kwargs) -> ProgressState | None:
+        """
+        Apply `kwargs` to the document's state. With `throttle=True` the write is dropped (and
+        None returned) if the previous throttled write was under `min_update_interval_s` ago;
+        untimed updates never count against that window.
+        """
+        # Single process: dict lookups and attribute sets are atomic under the GIL, and
+        # every update goes to the same state object, so no lock is needed here.
+        state = self._data[document_id]
+        if throttle and "state" not in kwargs:
+            now = time.monotonic()
+            if now - self._last_update.get(document_id, 0.0) < self.min_update_interval_s:
+                return None
+            self._last_update[document_id] = now
+        for k, v in kwargs.items():
+            setattr(state, k, v)
+        state.updated_at = utcnow()
+        return state